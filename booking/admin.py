@@ -55,11 +55,16 @@ class BookingEquipmentInline(admin.TabularInline):
     model = BookingEquipment
     extra = 0
     readonly_fields = ['equipment', 'quantity']
+    
+    def get_queryset(self, request):
+        # Each inline row renders its equipment and the parent booking's __str__
+        return super().get_queryset(request).select_related('equipment', 'booking__user', 'booking__court')
 
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'court', 'date', 'start_time', 'end_time', 'coach', 'total_price', 'status', 'created_at']
+    list_select_related = ['user', 'court', 'coach']
     list_filter = ['status', 'date', 'court', 'coach']
     search_fields = ['user__username', 'user__email']
     readonly_fields = ['user', 'court', 'date', 'start_time', 'end_time', 'coach', 
@@ -79,6 +84,14 @@ class BookingAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request).select_related('user', 'court', 'coach')
+        changelist_url_name = f'{self.opts.app_label}_{self.opts.model_name}_changelist'
+        if request.resolver_match and request.resolver_match.url_name == changelist_url_name:
+            # The changelist never shows the breakdown, while the change form does
+            queryset = queryset.defer('price_breakdown')
+        return queryset
+    
     def has_add_permission(self, request):
         # Bookings should be created through the frontend
         return False
@@ -87,6 +100,7 @@ class BookingAdmin(admin.ModelAdmin):
 @admin.register(Waitlist)
 class WaitlistAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'court', 'date', 'start_time', 'end_time', 'status', 'created_at', 'notified_at']
+    list_select_related = ['user', 'court']
     list_filter = ['status', 'date', 'court']
     search_fields = ['user__username', 'user__email']
     readonly_fields = ['user', 'court', 'date', 'start_time', 'end_time', 'created_at', 'notified_at']
@@ -100,4 +114,7 @@ class WaitlistAdmin(admin.ModelAdmin):
             'fields': ('status', 'created_at', 'notified_at')
         }),
     )
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user', 'court')
 
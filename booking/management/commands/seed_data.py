@@ -1,6 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
+from django.db import transaction
 from booking.models import Court, Equipment, Coach, CoachAvailability, PricingRule
+from booking.services.pricing import PricingRuleCache
 from datetime import time
 from decimal import Decimal
 
@@ -11,6 +13,17 @@ class Command(BaseCommand):
     def handle(self, *args, **kwargs):
         self.stdout.write('Seeding database...')
         
+        with transaction.atomic():
+            self._seed()
+        
+        self.stdout.write(self.style.SUCCESS('\n✓ Database seeding completed successfully!'))
+        self.stdout.write('\nYou can now:')
+        self.stdout.write('  1. Run: python manage.py runserver')
+        self.stdout.write('  2. Access admin panel: http://127.0.0.1:8000/admin/')
+        self.stdout.write('  3. Login with: admin / admin123')
+    
+    def _seed(self):
+        
         # Create Courts
         self.stdout.write('Creating courts...')
         courts_data = [
@@ -20,10 +33,13 @@ class Command(BaseCommand):
             {'name': 'Outdoor Court 2', 'court_type': 'OUTDOOR', 'is_active': True},
         ]
         
-        for court_data in courts_data:
-            court, created = Court.objects.get_or_create(**court_data)
-            if created:
-                self.stdout.write(f'  ✓ Created {court.name}')
+        existing_courts = set(Court.objects.values_list('name', flat=True))
+        new_courts = Court.objects.bulk_create([
+            Court(**court_data) for court_data in courts_data
+            if court_data['name'] not in existing_courts
+        ])
+        for court in new_courts:
+            self.stdout.write(f'  ✓ Created {court.name}')
         
         # Create Equipment
         self.stdout.write('Creating equipment...')
@@ -32,16 +48,17 @@ class Command(BaseCommand):
             {'name': 'Sports Shoes', 'equipment_type': 'SHOES', 'total_quantity': 8},
         ]
         
-        for equip_data in equipment_data:
-            equipment, created = Equipment.objects.get_or_create(
-                name=equip_data['name'],
-                defaults=equip_data
-            )
-            if created:
-                self.stdout.write(f'  ✓ Created {equipment.name}')
+        existing_equipment = set(Equipment.objects.values_list('name', flat=True))
+        new_equipment = Equipment.objects.bulk_create([
+            Equipment(**equip_data) for equip_data in equipment_data
+            if equip_data['name'] not in existing_equipment
+        ])
+        for equipment in new_equipment:
+            self.stdout.write(f'  ✓ Created {equipment.name}')
         
         # Create Coaches
         self.stdout.write('Creating coaches...')
+        availability_slots = []
         
         # Coach A - Mon-Fri 9AM-6PM
         coach_a, created = Coach.objects.get_or_create(
@@ -52,12 +69,12 @@ class Command(BaseCommand):
             self.stdout.write(f'  ✓ Created {coach_a.name}')
             # Add availability
             for day in range(0, 5):  # Monday to Friday
-                CoachAvailability.objects.create(
+                availability_slots.append(CoachAvailability(
                     coach=coach_a,
                     day_of_week=day,
                     start_time=time(9, 0),
                     end_time=time(18, 0)
-                )
+                ))
         
         # Coach B - Mon-Sat 10AM-8PM
         coach_b, created = Coach.objects.get_or_create(
@@ -68,12 +85,12 @@ class Command(BaseCommand):
             self.stdout.write(f'  ✓ Created {coach_b.name}')
             # Add availability
             for day in range(0, 6):  # Monday to Saturday
-                CoachAvailability.objects.create(
+                availability_slots.append(CoachAvailability(
                     coach=coach_b,
                     day_of_week=day,
                     start_time=time(10, 0),
                     end_time=time(20, 0)
-                )
+                ))
         
         # Coach C - Weekends 8AM-8PM
         coach_c, created = Coach.objects.get_or_create(
@@ -84,12 +101,14 @@ class Command(BaseCommand):
             self.stdout.write(f'  ✓ Created {coach_c.name}')
             # Add availability
             for day in [5, 6]:  # Saturday and Sunday
-                CoachAvailability.objects.create(
+                availability_slots.append(CoachAvailability(
                     coach=coach_c,
                     day_of_week=day,
                     start_time=time(8, 0),
                     end_time=time(20, 0)
-                )
+                ))
+        
+        CoachAvailability.objects.bulk_create(availability_slots)
         
         # Create Pricing Rules
         self.stdout.write('Creating pricing rules...')
@@ -154,13 +173,22 @@ class Command(BaseCommand):
             },
         ]
         
-        for rule_data in pricing_rules:
-            rule, created = PricingRule.objects.get_or_create(
-                name=rule_data['name'],
-                defaults=rule_data
-            )
-            if created:
-                self.stdout.write(f'  ✓ Created pricing rule: {rule.name}')
+        existing_rules = set(PricingRule.objects.values_list('name', flat=True))
+        new_rules = [
+            PricingRule(**rule_data) for rule_data in pricing_rules
+            if rule_data['name'] not in existing_rules
+        ]
+        # bulk_create skips save(), so fill in the day masks here
+        for rule in new_rules:
+            rule.sync_days_mask()
+        PricingRule.objects.bulk_create(new_rules)
+        for rule in new_rules:
+            self.stdout.write(f'  ✓ Created pricing rule: {rule.name}')
+        
+        if new_rules:
+            # bulk_create does not send post_save, so refresh cached rules
+            # explicitly once the seeding transaction commits
+            transaction.on_commit(PricingRuleCache.invalidate)
         
         # Create admin user if not exists
         self.stdout.write('Creating admin user...')
@@ -173,9 +201,3 @@ class Command(BaseCommand):
             self.stdout.write('  ✓ Created admin user (username: admin, password: admin123)')
         else:
             self.stdout.write('  ℹ Admin user already exists')
-        
-        self.stdout.write(self.style.SUCCESS('\n✓ Database seeding completed successfully!'))
-        self.stdout.write('\nYou can now:')
-        self.stdout.write('  1. Run: python manage.py runserver')
-        self.stdout.write('  2. Access admin panel: http://127.0.0.1:8000/admin/')
-        self.stdout.write('  3. Login with: admin / admin123')
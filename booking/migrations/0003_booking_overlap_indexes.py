@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-15 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0002_waitlist'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'CONFIRMED')), fields=['date', 'court', 'start_time', 'end_time'], name='booking_court_overlap_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'CONFIRMED')), fields=['date', 'coach', 'start_time', 'end_time'], name='booking_coach_overlap_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-15 02:47
+
+from django.db import migrations, models
+
+
+def populate_days_mask(apps, schema_editor):
+    PricingRule = apps.get_model('booking', 'PricingRule')
+    for rule in PricingRule.objects.exclude(applies_to_days=''):
+        mask = 0
+        for day in rule.applies_to_days.split(','):
+            day = day.strip()
+            if day.isdigit() and 0 <= int(day) <= 6:
+                mask |= 1 << int(day)
+        rule.applies_to_days_mask = mask
+        rule.save(update_fields=['applies_to_days_mask'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0003_booking_overlap_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pricingrule',
+            name='applies_to_days_mask',
+            field=models.SmallIntegerField(default=0, editable=False, help_text='Bit mask of applies_to_days (bit N set for day N), kept in sync on save'),
+        ),
+        migrations.RunPython(populate_days_mask, migrations.RunPython.noop),
+    ]
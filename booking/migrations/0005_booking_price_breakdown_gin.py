@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-15 02:47
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+def create_breakdown_gin_index(apps, schema_editor):
+    # GIN indexes on jsonb are PostgreSQL-only; other backends keep a plain column
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS booking_breakdown_gin '
+            'ON booking_booking USING gin (price_breakdown)'
+        )
+
+
+def drop_breakdown_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS booking_breakdown_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0004_pricingrule_applies_to_days_mask'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='booking',
+            name='price_breakdown',
+            field=models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Detailed breakdown of pricing rules applied'),
+        ),
+        migrations.RunPython(create_breakdown_gin_index, drop_breakdown_gin_index),
+    ]
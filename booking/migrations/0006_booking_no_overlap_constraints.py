@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def add_overlap_constraints(apps, schema_editor):
+    # Exclusion constraints with GiST are PostgreSQL-only; other backends rely on
+    # the row lock taken in confirm_booking
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    for name, column in [('booking_no_court_overlap', 'court_id'), ('booking_no_coach_overlap', 'coach_id')]:
+        schema_editor.execute(
+            f'ALTER TABLE booking_booking ADD CONSTRAINT {name} EXCLUDE USING gist ('
+            f'{column} WITH =, '
+            f'tsrange(date + start_time, date + end_time) WITH &&'
+            f") WHERE (status = 'CONFIRMED')"
+        )
+
+
+def remove_overlap_constraints(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in ['booking_no_court_overlap', 'booking_no_coach_overlap']:
+        schema_editor.execute(f'ALTER TABLE booking_booking DROP CONSTRAINT IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0005_booking_price_breakdown_gin'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_overlap_constraints, remove_overlap_constraints),
+    ]
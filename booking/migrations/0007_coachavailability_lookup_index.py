@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-15 02:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0006_booking_no_overlap_constraints'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coachavailability',
+            index=models.Index(fields=['day_of_week', 'coach', 'start_time', 'end_time'], name='coach_avail_lookup_idx'),
+        ),
+    ]
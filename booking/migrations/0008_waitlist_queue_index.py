@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-15 02:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0007_coachavailability_lookup_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='waitlist',
+            name='booking_wai_court_i_df9100_idx',
+        ),
+        migrations.AddIndex(
+            model_name='waitlist',
+            index=models.Index(fields=['court', 'date', 'start_time', 'end_time', 'status', 'created_at'], name='booking_wai_court_i_a24c10_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-15 02:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0008_waitlist_queue_index'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='waitlist',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'WAITING')), fields=('user', 'court', 'date', 'start_time', 'end_time'), name='uniq_waiting_slot'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-15 02:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0009_waitlist_uniq_waiting_slot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'date', 'start_time'], name='booking_user_history_idx'),
+        ),
+    ]
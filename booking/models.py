@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models import F, Q
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
 
@@ -41,13 +44,9 @@ class Equipment(models.Model):
         from django.db.models import Sum
         
         # Get all bookings for this equipment in the time slot
-        booked_quantity = BookingEquipment.objects.filter(
-            equipment=self,
-            booking__date=date,
-            booking__start_time__lt=end_time,
-            booking__end_time__gt=start_time,
-            booking__status='CONFIRMED'
-        ).aggregate(total=Sum('quantity'))['total'] or 0
+        booked_quantity = BookingEquipment.objects.overlapping(
+            date, start_time, end_time
+        ).filter(equipment=self).aggregate(total=Sum('quantity'))['total'] or 0
         
         return self.total_quantity - booked_quantity
     
@@ -91,6 +90,9 @@ class CoachAvailability(models.Model):
     class Meta:
         ordering = ['coach', 'day_of_week', 'start_time']
         verbose_name_plural = 'Coach Availabilities'
+        indexes = [
+            models.Index(fields=['day_of_week', 'coach', 'start_time', 'end_time'], name='coach_avail_lookup_idx'),
+        ]
 
 
 class PricingRule(models.Model):
@@ -137,14 +139,60 @@ class PricingRule(models.Model):
         blank=True,
         help_text="Comma-separated day numbers (0=Mon, 6=Sun). E.g., '5,6' for weekends"
     )
+    applies_to_days_mask = models.SmallIntegerField(
+        default=0,
+        editable=False,
+        help_text="Bit mask of applies_to_days (bit N set for day N), kept in sync on save"
+    )
     
     def __str__(self):
         return f"{self.name} ({'Enabled' if self.is_enabled else 'Disabled'})"
     
+    @staticmethod
+    def days_to_mask(applies_to_days):
+        """Convert comma-separated day numbers into a weekday bit mask"""
+        mask = 0
+        for day in (applies_to_days or '').split(','):
+            if day.strip():
+                day_number = int(day)
+                if not 0 <= day_number <= 6:
+                    raise ValueError(f"Invalid day number: {day_number}")
+                mask |= 1 << day_number
+        return mask
+    
+    def sync_days_mask(self):
+        """Recompute applies_to_days_mask from applies_to_days"""
+        self.applies_to_days_mask = self.days_to_mask(self.applies_to_days)
+    
+    def clean(self):
+        try:
+            self.days_to_mask(self.applies_to_days)
+        except ValueError:
+            raise ValidationError({
+                'applies_to_days': "Enter comma-separated day numbers between 0 (Mon) and 6 (Sun)."
+            })
+    
+    def save(self, *args, **kwargs):
+        self.sync_days_mask()
+        super().save(*args, **kwargs)
+    
     class Meta:
         ordering = ['priority', 'name']
 
 
+class BookingQuerySet(models.QuerySet):
+    """QuerySet helpers for bookings"""
+    
+    def overlapping(self, date, start_time, end_time):
+        """Confirmed bookings that overlap the given time slot"""
+        return self.filter(
+            date=date,
+            start_time__lt=end_time,
+            end_time__gt=start_time,
+            status='CONFIRMED'
+        ).only('id', 'court', 'coach')
+
+
 class Booking(models.Model):
     """Court booking with optional equipment and coach"""
     STATUS_CHOICES = [
@@ -161,12 +209,18 @@ class Booking(models.Model):
     
     base_price = models.DecimalField(max_digits=10, decimal_places=2)
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
-    price_breakdown = models.JSONField(default=dict, help_text="Detailed breakdown of pricing rules applied")
+    price_breakdown = models.JSONField(
+        default=dict,
+        encoder=DjangoJSONEncoder,
+        help_text="Detailed breakdown of pricing rules applied"
+    )
     
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='CONFIRMED')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = BookingQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.user.username} - {self.court.name} on {self.date} ({self.start_time}-{self.end_time})"
     
@@ -175,15 +229,43 @@ class Booking(models.Model):
         indexes = [
             models.Index(fields=['date', 'start_time', 'end_time']),
             models.Index(fields=['court', 'date']),
+            # Partial indexes for the confirmed-booking overlap checks
+            models.Index(
+                fields=['date', 'court', 'start_time', 'end_time'],
+                condition=Q(status='CONFIRMED'),
+                name='booking_court_overlap_idx',
+            ),
+            models.Index(
+                fields=['date', 'coach', 'start_time', 'end_time'],
+                condition=Q(status='CONFIRMED'),
+                name='booking_coach_overlap_idx',
+            ),
+            # Booking history: one user's bookings, newest first
+            models.Index(fields=['user', 'date', 'start_time'], name='booking_user_history_idx'),
         ]
 
 
+class BookingEquipmentQuerySet(models.QuerySet):
+    """QuerySet helpers for booked equipment"""
+    
+    def overlapping(self, date, start_time, end_time):
+        """Equipment items on confirmed bookings that overlap the given time slot"""
+        return self.filter(
+            booking__date=date,
+            booking__start_time__lt=end_time,
+            booking__end_time__gt=start_time,
+            booking__status='CONFIRMED'
+        )
+
+
 class BookingEquipment(models.Model):
     """Through model for booking equipment with quantities"""
     booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='equipment_items')
     equipment = models.ForeignKey(Equipment, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
     
+    objects = BookingEquipmentQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.booking} - {self.equipment.name} x{self.quantity}"
     
@@ -214,5 +296,44 @@ class Waitlist(models.Model):
     class Meta:
         ordering = ['created_at']  # FIFO queue
         indexes = [
-            models.Index(fields=['court', 'date', 'start_time', 'end_time', 'status']),
+            models.Index(fields=['court', 'date', 'start_time', 'end_time', 'status', 'created_at']),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'court', 'date', 'start_time', 'end_time'],
+                condition=Q(status='WAITING'),
+                name='uniq_waiting_slot',
+            ),
+        ]
+
+
+class CacheVersion(models.Model):
+    """
+    Version counter for cached data, shared by every process through the database
+    
+    Cache entries embed the current version in their keys; bumping the version
+    makes every process load fresh data regardless of the cache backend.
+    Reading a version is a query, so readers on hot paths should keep the value
+    for a short interval rather than call get_version() every time (see
+    PricingRuleCache.VERSION_CHECK_INTERVAL).
+    """
+    key = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=1)
+    
+    def __str__(self):
+        return f"{self.key} (v{self.version})"
+    
+    @classmethod
+    def get_version(cls, key):
+        """Return the current version for key (0 if it was never bumped)"""
+        return cls.objects.filter(key=key).values_list('version', flat=True).first() or 0
+    
+    @classmethod
+    def bump(cls, key):
+        """Increment the version for key"""
+        if cls.objects.filter(key=key).update(version=F('version') + 1):
+            return
+        _, created = cls.objects.get_or_create(key=key)
+        if not created:
+            # Another process created the row first
+            cls.objects.filter(key=key).update(version=F('version') + 1)
@@ -1,27 +1,52 @@
-from datetime import datetime, time, timedelta
-from django.db.models import Q, Sum
-from booking.models import Court, Equipment, Coach, CoachAvailability, Booking, BookingEquipment
+from collections import namedtuple
+from datetime import time
+from functools import lru_cache
+from django.core.cache import cache
+from django.db.models import Exists, F, OuterRef, Q, Sum
+from django.db.models.functions import Coalesce
+from booking.models import Court, Equipment, Coach, CoachAvailability, Booking, BookingEquipment, CacheVersion
+
+
+TimeSlot = namedtuple('TimeSlot', ['start_time', 'end_time', 'display'])
+
+
+@lru_cache(maxsize=32)
+def _build_time_slots(slot_duration_minutes):
+    """Build the operating-hours time slots for the given slot duration"""
+    start_minute = 6 * 60  # 6 AM
+    end_minute = 22 * 60   # 10 PM
+    
+    # Slot boundaries within operating hours, each formatted only once
+    boundaries = [
+        time(minutes // 60, minutes % 60)
+        for minutes in range(start_minute, end_minute + 1, slot_duration_minutes)
+    ]
+    labels = [boundary.strftime('%I:%M %p') for boundary in boundaries]
+    
+    # Immutable rows, since the same tuple is returned to every caller
+    return tuple(
+        TimeSlot(boundaries[i], boundaries[i + 1], f"{labels[i]} - {labels[i + 1]}")
+        for i in range(len(boundaries) - 1)
+    )
 
 
 class AvailabilityService:
     """Service for checking resource availability"""
     
+    DAY_GRID_VERSION_KEY = 'day_grid:{date}'
+    DAY_GRID_KEY = 'day_grid:{date}:v{version}'
+    DAY_GRID_TIMEOUT = 60
+    
     @staticmethod
     def get_available_courts(date, start_time, end_time):
         """Get all courts available for the given time slot"""
-        # Get all active courts
-        all_courts = Court.objects.filter(is_active=True)
-        
-        # Get courts that are already booked in this time slot
-        booked_court_ids = Booking.objects.filter(
-            date=date,
-            start_time__lt=end_time,
-            end_time__gt=start_time,
-            status='CONFIRMED'
-        ).values_list('court_id', flat=True)
-        
-        # Return courts that are not booked
-        return all_courts.exclude(id__in=booked_court_ids)
+        # Courts that already have a confirmed booking in this time slot
+        court_booked = Booking.objects.overlapping(date, start_time, end_time).filter(
+            court_id=OuterRef('pk')
+        )
+        
+        # Return active courts that are not booked, as a single anti-join query
+        return Court.objects.filter(is_active=True).filter(~Exists(court_booked))
     
     @staticmethod
     def get_available_equipment(date, start_time, end_time, equipment_type=None):
@@ -31,9 +56,16 @@ class AvailabilityService:
         if equipment_type:
             equipment_qs = equipment_qs.filter(equipment_type=equipment_type)
         
+        # Booked quantity per equipment in a single grouped query
+        booked_quantities = dict(
+            BookingEquipment.objects.overlapping(date, start_time, end_time).filter(
+                equipment__in=equipment_qs
+            ).values('equipment_id').annotate(booked=Sum('quantity')).values_list('equipment_id', 'booked')
+        )
+        
         available_equipment = []
         for equipment in equipment_qs:
-            available_qty = equipment.get_available_quantity(date, start_time, end_time)
+            available_qty = equipment.total_quantity - booked_quantities.get(equipment.id, 0)
             if available_qty > 0:
                 available_equipment.append({
                     'equipment': equipment,
@@ -42,44 +74,58 @@ class AvailabilityService:
         
         return available_equipment
     
+    @staticmethod
+    def has_available_equipment(date, start_time, end_time, equipment_type=None, min_quantity=1):
+        """
+        Check whether any equipment has at least min_quantity units free
+        
+        Answers with a single aggregate query instead of computing the
+        available quantity of every item.
+        """
+        booked = Coalesce(Sum('bookingequipment__quantity', filter=Q(
+            bookingequipment__booking__date=date,
+            bookingequipment__booking__start_time__lt=end_time,
+            bookingequipment__booking__end_time__gt=start_time,
+            bookingequipment__booking__status='CONFIRMED'
+        )), 0)
+        
+        equipment_qs = Equipment.objects.all()
+        if equipment_type:
+            equipment_qs = equipment_qs.filter(equipment_type=equipment_type)
+        
+        return equipment_qs.annotate(booked=booked).filter(
+            total_quantity__gte=F('booked') + min_quantity
+        ).exists()
+    
     @staticmethod
     def get_available_coaches(date, start_time, end_time):
         """Get coaches available for the given time slot"""
         # Get day of week (0=Monday, 6=Sunday)
         day_of_week = date.weekday()
         
-        # Get coaches who have availability on this day and time
-        available_coach_ids = CoachAvailability.objects.filter(
+        # Coaches who have availability on this day and time
+        has_availability = CoachAvailability.objects.filter(
+            coach_id=OuterRef('pk'),
             day_of_week=day_of_week,
             start_time__lte=start_time,
-            end_time__gte=end_time,
-            coach__is_active=True
-        ).values_list('coach_id', flat=True)
-        
-        # Get coaches who are already booked in this time slot
-        booked_coach_ids = Booking.objects.filter(
-            date=date,
-            start_time__lt=end_time,
-            end_time__gt=start_time,
-            status='CONFIRMED',
-            coach__isnull=False
-        ).values_list('coach_id', flat=True)
-        
-        # Return coaches that are available but not booked
-        return Coach.objects.filter(
-            id__in=available_coach_ids
-        ).exclude(id__in=booked_coach_ids)
+            end_time__gte=end_time
+        )
+        
+        # Coaches who are already booked in this time slot
+        coach_booked = Booking.objects.overlapping(date, start_time, end_time).filter(
+            coach_id=OuterRef('pk')
+        )
+        
+        # Return active coaches that are available but not booked
+        return Coach.objects.filter(is_active=True).filter(
+            Exists(has_availability),
+            ~Exists(coach_booked)
+        )
     
     @staticmethod
     def check_court_available(court_id, date, start_time, end_time, exclude_booking_id=None):
         """Check if a specific court is available"""
-        query = Booking.objects.filter(
-            court_id=court_id,
-            date=date,
-            start_time__lt=end_time,
-            end_time__gt=start_time,
-            status='CONFIRMED'
-        )
+        query = Booking.objects.overlapping(date, start_time, end_time).filter(court_id=court_id)
         
         if exclude_booking_id:
             query = query.exclude(id=exclude_booking_id)
@@ -102,13 +148,7 @@ class AvailabilityService:
             return False
         
         # Then check if coach is not already booked
-        query = Booking.objects.filter(
-            coach_id=coach_id,
-            date=date,
-            start_time__lt=end_time,
-            end_time__gt=start_time,
-            status='CONFIRMED'
-        )
+        query = Booking.objects.overlapping(date, start_time, end_time).filter(coach_id=coach_id)
         
         if exclude_booking_id:
             query = query.exclude(id=exclude_booking_id)
@@ -121,12 +161,8 @@ class AvailabilityService:
         equipment = Equipment.objects.get(id=equipment_id)
         
         # Calculate booked quantity
-        query = BookingEquipment.objects.filter(
-            equipment_id=equipment_id,
-            booking__date=date,
-            booking__start_time__lt=end_time,
-            booking__end_time__gt=start_time,
-            booking__status='CONFIRMED'
+        query = BookingEquipment.objects.overlapping(date, start_time, end_time).filter(
+            equipment_id=equipment_id
         )
         
         if exclude_booking_id:
@@ -154,26 +190,56 @@ class AvailabilityService:
             dict with 'available' (bool) and 'errors' (list)
         """
         errors = []
+        court_id = int(court_id)
+        coach_id = int(coach_id) if coach_id else None
+        
+        # Check court and coach conflicts with a single overlap query
+        resource_filter = Q(court_id=court_id)
+        if coach_id:
+            resource_filter |= Q(coach_id=coach_id)
         
-        # Check court
-        if not AvailabilityService.check_court_available(court_id, date, start_time, end_time):
+        # order_by() drops the default Meta ordering, which would only add a sort
+        conflicts = Booking.objects.overlapping(date, start_time, end_time).filter(
+            resource_filter
+        ).order_by().values_list('court_id', 'coach_id')
+        
+        court_booked = False
+        coach_booked = False
+        for booked_court_id, booked_coach_id in conflicts:
+            court_booked = court_booked or booked_court_id == court_id
+            coach_booked = coach_booked or (coach_id is not None and booked_coach_id == coach_id)
+        
+        if court_booked:
             errors.append("Selected court is not available for this time slot")
         
-        # Check equipment
-        for item in equipment_list:
-            if not AvailabilityService.check_equipment_available(
-                item['equipment_id'], 
-                item['quantity'], 
-                date, 
-                start_time, 
-                end_time
-            ):
-                equipment = Equipment.objects.get(id=item['equipment_id'])
-                errors.append(f"Insufficient {equipment.name} available")
+        # Check equipment against one fetch of the rows and one grouped aggregate
+        if equipment_list:
+            equipment_ids = [int(item['equipment_id']) for item in equipment_list]
+            equipment_map = Equipment.objects.in_bulk(equipment_ids)
+            booked_quantities = dict(
+                BookingEquipment.objects.overlapping(date, start_time, end_time).filter(
+                    equipment_id__in=equipment_ids
+                ).values('equipment_id').annotate(booked=Sum('quantity')).values_list('equipment_id', 'booked')
+            )
+            
+            for equipment_id, item in zip(equipment_ids, equipment_list):
+                equipment = equipment_map.get(equipment_id)
+                if equipment is None:
+                    errors.append("Selected equipment does not exist")
+                    continue
+                available_quantity = equipment.total_quantity - booked_quantities.get(equipment_id, 0)
+                if available_quantity < item['quantity']:
+                    errors.append(f"Insufficient {equipment.name} available")
         
         # Check coach
         if coach_id:
-            if not AvailabilityService.check_coach_available(coach_id, date, start_time, end_time):
+            has_availability = CoachAvailability.objects.filter(
+                coach_id=coach_id,
+                day_of_week=date.weekday(),
+                start_time__lte=start_time,
+                end_time__gte=end_time
+            ).exists()
+            if coach_booked or not has_availability:
                 errors.append("Selected coach is not available for this time slot")
         
         return {
@@ -191,32 +257,102 @@ class AvailabilityService:
             slot_duration_minutes: Duration of each slot in minutes
         
         Returns:
-            List of dicts with 'start_time', 'end_time', 'display'
+            Tuple of TimeSlot namedtuples with 'start_time', 'end_time', 'display'
+        """
+        # Slots only depend on the duration, so they are built once and shared
+        return _build_time_slots(slot_duration_minutes)
+    
+    @staticmethod
+    def get_day_grid(date):
+        """
+        Get availability of every time slot on a date, cached per date
+        
+        The grid is cached under the date's version, which is kept in the
+        database (CacheVersion) so every process sees it change whenever a
+        booking on that date is committed (see invalidate_day_grid). Entries
+        also expire after DAY_GRID_TIMEOUT seconds, which bounds staleness
+        after court/equipment/coach edits.
+        
+        Returns:
+            dict keyed by 'HH:MM-HH:MM' (see build_day_grid)
+        """
+        version = CacheVersion.get_version(
+            AvailabilityService.DAY_GRID_VERSION_KEY.format(date=date.isoformat())
+        )
+        
+        return cache.get_or_set(
+            AvailabilityService.DAY_GRID_KEY.format(date=date.isoformat(), version=version),
+            lambda: AvailabilityService.build_day_grid(date),
+            AvailabilityService.DAY_GRID_TIMEOUT
+        )
+    
+    @staticmethod
+    def invalidate_day_grid(date):
+        """Publish a new grid version for the date so every process rebuilds it"""
+        CacheVersion.bump(AvailabilityService.DAY_GRID_VERSION_KEY.format(date=date.isoformat()))
+    
+    @staticmethod
+    def build_day_grid(date):
+        """
+        Build availability for every time slot on a date from a fixed number of queries
+        
+        Returns:
+            dict mapping 'HH:MM-HH:MM' to a dict with 'courts', 'equipment' and
+            'coaches' lists, in the same format as the availability API
         """
-        slots = []
-        start_hour = 6  # 6 AM
-        end_hour = 22   # 10 PM
-        
-        current_time = time(start_hour, 0)
-        end_time_limit = time(end_hour, 0)
-        
-        while current_time < end_time_limit:
-            # Calculate end time for this slot
-            current_datetime = datetime.combine(date, current_time)
-            end_datetime = current_datetime + timedelta(minutes=slot_duration_minutes)
-            slot_end_time = end_datetime.time()
+        courts = list(Court.objects.filter(is_active=True))
+        equipment = list(Equipment.objects.all())
+        coaches = list(Coach.objects.filter(is_active=True))
+        
+        bookings = list(
+            Booking.objects.filter(date=date, status='CONFIRMED').order_by().values(
+                'court_id', 'coach_id', 'start_time', 'end_time'
+            )
+        )
+        booked_items = list(
+            BookingEquipment.objects.filter(booking__date=date, booking__status='CONFIRMED').values(
+                'equipment_id', 'quantity', 'booking__start_time', 'booking__end_time'
+            )
+        )
+        
+        coach_windows = {}
+        for coach_id, start_time, end_time in CoachAvailability.objects.filter(
+            day_of_week=date.weekday()
+        ).order_by().values_list('coach_id', 'start_time', 'end_time'):
+            coach_windows.setdefault(coach_id, []).append((start_time, end_time))
+        
+        grid = {}
+        for slot in AvailabilityService.get_time_slots(date):
+            start_time, end_time = slot.start_time, slot.end_time
             
-            # Don't create slot if it goes beyond operating hours
-            if slot_end_time > end_time_limit:
-                break
+            overlapping = [b for b in bookings if b['start_time'] < end_time and b['end_time'] > start_time]
+            booked_courts = {b['court_id'] for b in overlapping}
+            booked_coaches = {b['coach_id'] for b in overlapping}
             
-            slots.append({
-                'start_time': current_time,
-                'end_time': slot_end_time,
-                'display': f"{current_time.strftime('%I:%M %p')} - {slot_end_time.strftime('%I:%M %p')}"
-            })
+            booked_quantities = {}
+            for item in booked_items:
+                if item['booking__start_time'] < end_time and item['booking__end_time'] > start_time:
+                    booked_quantities[item['equipment_id']] = (
+                        booked_quantities.get(item['equipment_id'], 0) + item['quantity']
+                    )
             
-            # Move to next slot
-            current_time = slot_end_time
+            grid[f"{start_time:%H:%M}-{end_time:%H:%M}"] = {
+                'courts': [
+                    {'id': c.id, 'name': c.name, 'type': c.court_type}
+                    for c in courts if c.id not in booked_courts
+                ],
+                'equipment': [
+                    {'id': e.id, 'name': e.name, 'available_qty': e.total_quantity - booked_quantities.get(e.id, 0)}
+                    for e in equipment if e.total_quantity - booked_quantities.get(e.id, 0) > 0
+                ],
+                'coaches': [
+                    {'id': c.id, 'name': c.name, 'fee': str(c.hourly_fee)}
+                    for c in coaches
+                    if c.id not in booked_coaches and any(
+                        window_start <= start_time and window_end >= end_time
+                        for window_start, window_end in coach_windows.get(c.id, [])
+                    )
+                ],
+            }
         
-        return slots
+        return grid
@@ -1,15 +1,108 @@
+import datetime
+import time
 from decimal import Decimal
-from datetime import datetime
-from booking.models import PricingRule, Court, Coach, Equipment
+from django.core.cache import cache
+from booking.models import CacheVersion, PricingRule, Court, Coach, Equipment
+from booking.utils.fastparse import parse_date, parse_hm
+
+
+class PricingRuleCache:
+    """
+    Cache of enabled pricing rules
+    
+    The rules version is kept in the database (CacheVersion), so a rule change
+    committed by any process is seen by all of them. Each process re-reads that
+    version at most once every VERSION_CHECK_INTERVAL seconds, so pricing does
+    not query the database on every call; another process may therefore keep
+    using the previous rules for up to VERSION_CHECK_INTERVAL seconds after a
+    change is committed (the process that made the change sees it at once).
+    
+    Rules are stored as plain dicts in Django's cache under a key that embeds
+    the version, and each process also keeps the list it last loaded; both
+    copies expire after RULES_TIMEOUT seconds.
+    """
+    
+    VERSION_KEY = 'pricing_rules'
+    VERSION_CHECK_INTERVAL = 5
+    RULES_KEY = 'pricing_rules:paisa:v{version}'
+    RULES_TIMEOUT = 300
+    RULE_FIELDS = [
+        'name', 'rule_type', 'is_percentage', 'multiplier', 'flat_fee',
+        'start_time', 'end_time', 'applies_to_days_mask',
+    ]
+    
+    _latest_version = None
+    _version_checked_at = None
+    _version = None
+    _rules = None
+    _loaded_at = 0.0
+    
+    @classmethod
+    def get_rules(cls):
+        """Return enabled pricing rules as dicts ordered by priority"""
+        now = time.monotonic()
+        if cls._version_checked_at is None or now - cls._version_checked_at > cls.VERSION_CHECK_INTERVAL:
+            cls._latest_version = CacheVersion.get_version(cls.VERSION_KEY)
+            cls._version_checked_at = now
+        
+        if (
+            cls._rules is None
+            or cls._latest_version != cls._version
+            or now - cls._loaded_at > cls.RULES_TIMEOUT
+        ):
+            cls._rules = cache.get_or_set(
+                cls.RULES_KEY.format(version=cls._latest_version),
+                cls._load_rules,
+                cls.RULES_TIMEOUT
+            )
+            cls._version = cls._latest_version
+            cls._loaded_at = now
+        return cls._rules
+    
+    @classmethod
+    def invalidate(cls):
+        """
+        Publish a new rules version so every process reloads its rules
+        
+        Call after the rule change is committed (e.g. via transaction.on_commit);
+        otherwise another process may cache the old rules under the new version.
+        """
+        CacheVersion.bump(cls.VERSION_KEY)
+        # Re-read the version on the next call so this process sees the change at once
+        cls._version_checked_at = None
+        cls._rules = None
+    
+    @classmethod
+    def _load_rules(cls):
+        rules = list(
+            PricingRule.objects.filter(is_enabled=True).order_by('priority').values(*cls.RULE_FIELDS)
+        )
+        for rule in rules:
+            # Integer forms used by PricingEngine: fees in paisa, multiplier as a fraction
+            rule['flat_paisa'] = to_paisa(rule['flat_fee'])
+            rule['mult_num'], rule['mult_den'] = rule['multiplier'].as_integer_ratio()
+        return rules
+
+
+def to_paisa(amount):
+    """Convert a rupee Decimal with at most 2 decimal places to integer paisa"""
+    return int(amount * 100)
+
+
+def from_paisa(paisa):
+    """Convert integer paisa back to a rupee Decimal with 2 decimal places"""
+    return Decimal(paisa).scaleb(-2)
 
 
 class PricingEngine:
     """Service for calculating dynamic pricing based on configurable rules"""
     
     BASE_COURT_PRICE = Decimal('500.00')  # Base price per hour slot
+    BASE_COURT_PRICE_PAISA = 50000
+    MAX_BATCH_ITEMS = 100  # Largest batch accepted by the bulk price endpoint
     
     @staticmethod
-    def calculate_price(court, date, start_time, end_time, equipment_list=None, coach=None):
+    def calculate_price(court, date, start_time, end_time, equipment_list=None, coach=None, pricing_rules=None):
         """
         Calculate total price with breakdown based on enabled pricing rules
         
@@ -20,6 +113,7 @@ class PricingEngine:
             end_time: End time
             equipment_list: List of Equipment instances (optional)
             coach: Coach instance (optional)
+            pricing_rules: Rules from PricingRuleCache.get_rules() (optional, fetched if omitted)
         
         Returns:
             dict with 'total_price', 'base_price', 'breakdown' (list of applied rules)
@@ -27,84 +121,84 @@ class PricingEngine:
         if equipment_list is None:
             equipment_list = []
         
-        # Start with base price
-        current_price = PricingEngine.BASE_COURT_PRICE
+        # Prices are summed as integer paisa and converted back to Decimal at the end
+        current_price = PricingEngine.BASE_COURT_PRICE_PAISA
         breakdown = [{
             'rule': 'Base Court Price',
             'type': 'base',
-            'amount': float(current_price)
+            'amount': current_price / 100
         }]
         
         # Get all enabled pricing rules ordered by priority
-        pricing_rules = PricingRule.objects.filter(is_enabled=True).order_by('priority')
+        if pricing_rules is None:
+            pricing_rules = PricingRuleCache.get_rules()
         
         day_of_week = date.weekday()
         
         for rule in pricing_rules:
             applied = False
-            rule_amount = Decimal('0.00')
+            rule_amount = 0
             
             # Check if rule applies based on type
-            if rule.rule_type == 'PEAK_HOURS':
+            if rule['rule_type'] == 'PEAK_HOURS':
                 # Check if booking time overlaps with peak hours
-                if rule.start_time and rule.end_time:
-                    if PricingEngine._time_overlaps(start_time, end_time, rule.start_time, rule.end_time):
+                if rule['start_time'] and rule['end_time']:
+                    if PricingEngine._time_overlaps(start_time, end_time, rule['start_time'], rule['end_time']):
                         applied = True
             
-            elif rule.rule_type == 'WEEKEND':
+            elif rule['rule_type'] == 'WEEKEND':
                 # Check if booking is on specified days
-                if rule.applies_to_days:
-                    applicable_days = [int(d.strip()) for d in rule.applies_to_days.split(',') if d.strip()]
-                    if day_of_week in applicable_days:
-                        applied = True
+                if rule['applies_to_days_mask'] & (1 << day_of_week):
+                    applied = True
             
-            elif rule.rule_type == 'INDOOR_PREMIUM':
+            elif rule['rule_type'] == 'INDOOR_PREMIUM':
                 # Check if court is indoor
                 if court.court_type == 'INDOOR':
                     applied = True
             
-            elif rule.rule_type == 'EQUIPMENT_FEE':
+            elif rule['rule_type'] == 'EQUIPMENT_FEE':
                 # Apply for each equipment item
                 if equipment_list:
                     applied = True
             
-            elif rule.rule_type == 'COACH_FEE':
+            elif rule['rule_type'] == 'COACH_FEE':
                 # Apply if coach is selected
                 if coach:
                     applied = True
             
             # Apply the rule if conditions are met
             if applied:
-                if rule.is_percentage:
-                    # Apply multiplier to current price
-                    additional_amount = current_price * (rule.multiplier - Decimal('1.0'))
+                if rule['is_percentage']:
+                    # Apply multiplier to current price, rounded to the nearest paisa
+                    mult_num, mult_den = rule['mult_num'], rule['mult_den']
+                    additional_amount = (2 * current_price * (mult_num - mult_den) + mult_den) // (2 * mult_den)
                     rule_amount = additional_amount
                     current_price += additional_amount
                 else:
                     # Add flat fee
-                    if rule.rule_type == 'EQUIPMENT_FEE':
+                    if rule['rule_type'] == 'EQUIPMENT_FEE':
                         # Apply flat fee per equipment item
-                        total_equipment_fee = rule.flat_fee * len(equipment_list)
+                        total_equipment_fee = rule['flat_paisa'] * len(equipment_list)
                         rule_amount = total_equipment_fee
                         current_price += total_equipment_fee
-                    elif rule.rule_type == 'COACH_FEE':
+                    elif rule['rule_type'] == 'COACH_FEE':
                         # Use coach's hourly fee
-                        rule_amount = coach.hourly_fee
-                        current_price += coach.hourly_fee
+                        rule_amount = to_paisa(coach.hourly_fee)
+                        current_price += rule_amount
                     else:
-                        rule_amount = rule.flat_fee
-                        current_price += rule.flat_fee
+                        rule_amount = rule['flat_paisa']
+                        current_price += rule['flat_paisa']
                 
                 breakdown.append({
-                    'rule': rule.name,
-                    'type': rule.rule_type,
-                    'amount': float(rule_amount),
-                    'is_percentage': rule.is_percentage,
-                    'multiplier': float(rule.multiplier) if rule.is_percentage else None
+                    'rule': rule['name'],
+                    'type': rule['rule_type'],
+                    'amount': rule_amount / 100,
+                    'is_percentage': rule['is_percentage'],
+                    'multiplier': float(rule['multiplier']) if rule['is_percentage'] else None
                 })
         
         return {
-            'total_price': current_price,
+            'total_price': from_paisa(current_price),
             'base_price': PricingEngine.BASE_COURT_PRICE,
             'breakdown': breakdown
         }
@@ -135,15 +229,7 @@ class PricingEngine:
         except Court.DoesNotExist:
             return {'error': 'Court not found'}
         
-        # Parse date if string
-        if isinstance(date, str):
-            date = datetime.strptime(date, '%Y-%m-%d').date()
-        
-        # Parse times if strings
-        if isinstance(start_time, str):
-            start_time = datetime.strptime(start_time, '%H:%M').time()
-        if isinstance(end_time, str):
-            end_time = datetime.strptime(end_time, '%H:%M').time()
+        date, start_time, end_time = PricingEngine._parse_slot(date, start_time, end_time)
         
         # Get equipment instances
         equipment_list = []
@@ -164,3 +250,101 @@ class PricingEngine:
         )
         
         return pricing_data
+    
+    @staticmethod
+    def calculate_prices_batch(items):
+        """
+        Get price previews for many slots at once
+        
+        Courts, equipment and coaches for all items are fetched with one query
+        each and the pricing rules are read once for the whole batch.
+        
+        Args:
+            items: List of dicts with 'court_id', 'date', 'start_time', 'end_time'
+                and optional 'equipment_ids' and 'coach_id' (same formats as
+                get_price_preview)
+        
+        Returns:
+            List of pricing dicts, in the order of items; an unknown court or a
+            malformed item gives a dict with 'error' for that item only
+        """
+        # Normalise every item first; a malformed item only fails its own result
+        parsed = []
+        for item in items:
+            try:
+                parsed.append(PricingEngine._parse_batch_item(item))
+            except (ValueError, TypeError) as e:
+                parsed.append(e)
+        valid = [p for p in parsed if not isinstance(p, Exception)]
+        
+        courts = Court.objects.in_bulk({p['court_id'] for p in valid if p['court_id']})
+        equipment = Equipment.objects.in_bulk({eid for p in valid for eid in p['equipment_ids']})
+        coaches = Coach.objects.in_bulk({p['coach_id'] for p in valid if p['coach_id']})
+        pricing_rules = PricingRuleCache.get_rules()
+        
+        results = []
+        for p in parsed:
+            if isinstance(p, Exception):
+                results.append({'error': str(p)})
+                continue
+            
+            court = courts.get(p['court_id'])
+            if court is None:
+                results.append({'error': 'Court not found'})
+                continue
+            
+            # Unknown or repeated equipment IDs are ignored, as in get_price_preview
+            equipment_list = [equipment[eid] for eid in p['equipment_ids'] if eid in equipment]
+            coach = coaches.get(p['coach_id']) if p['coach_id'] else None
+            
+            results.append(PricingEngine.calculate_price(
+                court, p['date'], p['start_time'], p['end_time'], equipment_list, coach, pricing_rules
+            ))
+        
+        return results
+    
+    @staticmethod
+    def _parse_batch_item(item):
+        """
+        Validate one calculate_prices_batch item and convert its values
+        
+        Raises:
+            ValueError or TypeError if the item is malformed
+        """
+        if not isinstance(item, dict):
+            raise TypeError('Each item must be an object')
+        
+        date, start_time, end_time = PricingEngine._parse_slot(
+            item.get('date'), item.get('start_time'), item.get('end_time')
+        )
+        if not (
+            isinstance(date, datetime.date)
+            and isinstance(start_time, datetime.time)
+            and isinstance(end_time, datetime.time)
+        ):
+            raise ValueError("date ('YYYY-MM-DD'), start_time and end_time ('HH:MM') are required")
+        
+        equipment_ids = item.get('equipment_ids') or []
+        if not isinstance(equipment_ids, list):
+            # A string would otherwise be read one character at a time
+            raise TypeError('equipment_ids must be a list')
+        
+        return {
+            'court_id': int(item['court_id']) if item.get('court_id') else None,
+            'date': date,
+            'start_time': start_time,
+            'end_time': end_time,
+            'equipment_ids': list(dict.fromkeys(int(eid) for eid in equipment_ids)),
+            'coach_id': int(item['coach_id']) if item.get('coach_id') else None,
+        }
+    
+    @staticmethod
+    def _parse_slot(date, start_time, end_time):
+        """Parse date ('%Y-%m-%d') and times ('%H:%M') given as strings"""
+        if isinstance(date, str):
+            date = parse_date(date)
+        if isinstance(start_time, str):
+            start_time = parse_hm(start_time)
+        if isinstance(end_time, str):
+            end_time = parse_hm(end_time)
+        return date, start_time, end_time
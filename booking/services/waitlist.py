@@ -2,7 +2,8 @@
 Waitlist service for handling waitlist operations and notifications
 """
 from django.utils import timezone
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Q, Subquery
 from ..models import Waitlist, Booking
 
 
@@ -22,32 +23,34 @@ class WaitlistService:
             end_time: End time
             
         Returns:
-            Waitlist object or None if already in waitlist
+            Tuple of (Waitlist object, position in queue), or (None, None) if
+            already in waitlist
         """
-        # Check if user is already in waitlist for this slot
-        existing = Waitlist.objects.filter(
-            user=user,
-            court=court,
-            date=date,
-            start_time=start_time,
-            end_time=end_time,
-            status='WAITING'
-        ).first()
-        
-        if existing:
-            return None
-        
-        # Create waitlist entry
-        waitlist_entry = Waitlist.objects.create(
-            user=user,
-            court=court,
-            date=date,
-            start_time=start_time,
-            end_time=end_time,
-            status='WAITING'
-        )
+        with transaction.atomic():
+            # The unique constraint on waiting entries makes this safe against double clicks
+            waitlist_entry, created = Waitlist.objects.get_or_create(
+                user=user,
+                court=court,
+                date=date,
+                start_time=start_time,
+                end_time=end_time,
+                status='WAITING'
+            )
+            
+            if not created:
+                return None, None
+            
+            # Count entries queued no later than the new one (ties broken by id)
+            position = Waitlist.objects.filter(
+                Q(created_at__lt=waitlist_entry.created_at) | Q(created_at=waitlist_entry.created_at, id__lte=waitlist_entry.id),
+                court=court,
+                date=date,
+                start_time=start_time,
+                end_time=end_time,
+                status='WAITING'
+            ).count()
         
-        return waitlist_entry
+        return waitlist_entry, position
     
     @staticmethod
     def get_waitlist_position(user, court, date, start_time, end_time):
@@ -57,19 +60,27 @@ class WaitlistService:
         Returns:
             Position number (1-indexed) or None if not in waitlist
         """
-        waitlist_entries = Waitlist.objects.filter(
+        my_entry = Waitlist.objects.filter(
+            user=user,
             court=court,
             date=date,
             start_time=start_time,
             end_time=end_time,
             status='WAITING'
-        ).order_by('created_at')
+        ).values('id', 'created_at').first()
         
-        for idx, entry in enumerate(waitlist_entries, start=1):
-            if entry.user == user:
-                return idx
+        if my_entry is None:
+            return None
         
-        return None
+        # Count entries queued no later than the user's own (ties broken by id)
+        return Waitlist.objects.filter(
+            Q(created_at__lt=my_entry['created_at']) | Q(created_at=my_entry['created_at'], id__lte=my_entry['id']),
+            court=court,
+            date=date,
+            start_time=start_time,
+            end_time=end_time,
+            status='WAITING'
+        ).count()
     
     @staticmethod
     def notify_next_in_queue(court, date, start_time, end_time):
@@ -85,29 +96,51 @@ class WaitlistService:
         Returns:
             Waitlist entry that was notified, or None if queue is empty
         """
-        with transaction.atomic():
-            # Get the next person in queue (FIFO)
-            next_in_queue = Waitlist.objects.filter(
-                court=court,
-                date=date,
-                start_time=start_time,
-                end_time=end_time,
-                status='WAITING'
-            ).select_for_update().order_by('created_at').first()
-            
-            if next_in_queue:
-                # Mark as notified
-                next_in_queue.status = 'NOTIFIED'
-                next_in_queue.notified_at = timezone.now()
-                next_in_queue.save()
-                
-                # In a real application, send email/SMS notification here
-                # For now, we'll just log it
-                print(f"NOTIFICATION: {next_in_queue.user.username} - Slot available for {court.name} on {date} ({start_time}-{end_time})")
+        if connection.vendor == 'postgresql':
+            # Claim and update the head of the queue in one statement; SKIP LOCKED
+            # lets concurrent cancellations notify different entries instead of
+            # waiting on the same row
+            notified = list(Waitlist.objects.raw(
+                """
+                UPDATE booking_waitlist SET status = 'NOTIFIED', notified_at = %s
+                WHERE id = (
+                    SELECT id FROM booking_waitlist
+                    WHERE court_id = %s AND date = %s AND start_time = %s AND end_time = %s
+                        AND status = 'WAITING'
+                    ORDER BY created_at, id
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING *
+                """,
+                [timezone.now(), court.id, date, start_time, end_time]
+            ))
+            next_in_queue = notified[0] if notified else None
+        else:
+            with transaction.atomic():
+                # Get the next person in queue (FIFO)
+                next_in_queue = Waitlist.objects.filter(
+                    court=court,
+                    date=date,
+                    start_time=start_time,
+                    end_time=end_time,
+                    status='WAITING'
+                ).select_related('user').select_for_update(of=('self',)).only(
+                    'id', 'status', 'notified_at', 'user', 'user__username'
+                ).order_by('created_at', 'id').first()
                 
-                return next_in_queue
+                if next_in_queue:
+                    # Mark as notified
+                    next_in_queue.status = 'NOTIFIED'
+                    next_in_queue.notified_at = timezone.now()
+                    next_in_queue.save(update_fields=['status', 'notified_at'])
+        
+        if next_in_queue:
+            # In a real application, send email/SMS notification here
+            # For now, we'll just log it
+            print(f"NOTIFICATION: {next_in_queue.user.username} - Slot available for {court.name} on {date} ({start_time}-{end_time})")
         
-        return None
+        return next_in_queue
     
     @staticmethod
     def expire_old_notifications():
@@ -132,12 +165,22 @@ class WaitlistService:
         Get all active waitlist entries for a user
         
         Returns:
-            QuerySet of Waitlist objects
+            QuerySet of Waitlist objects annotated with 'position' (queue position
+            of waiting entries)
         """
+        queued_before = Waitlist.objects.filter(
+            Q(created_at__lt=OuterRef('created_at')) | Q(created_at=OuterRef('created_at'), id__lte=OuterRef('id')),
+            court=OuterRef('court'),
+            date=OuterRef('date'),
+            start_time=OuterRef('start_time'),
+            end_time=OuterRef('end_time'),
+            status='WAITING'
+        ).order_by().values('court').annotate(count=Count('*')).values('count')
+        
         return Waitlist.objects.filter(
             user=user,
             status__in=['WAITING', 'NOTIFIED']
-        ).select_related('court').order_by('created_at')
+        ).select_related('court').annotate(position=Subquery(queued_before)).order_by('created_at')
     
     @staticmethod
     def remove_from_waitlist(waitlist_id, user):
@@ -0,0 +1,24 @@
+"""
+Signal handlers for keeping cached data in sync with the database
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import PricingRule, Booking
+from .services.availability import AvailabilityService
+from .services.pricing import PricingRuleCache
+
+
+@receiver(post_save, sender=PricingRule)
+@receiver(post_delete, sender=PricingRule)
+def invalidate_pricing_rules(sender, **kwargs):
+    """Reload pricing rules once a rule change is committed"""
+    transaction.on_commit(PricingRuleCache.invalidate)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_day_grid(sender, instance, **kwargs):
+    """Rebuild the availability grid for the booking's date once the change is committed"""
+    booking_date = instance.date
+    transaction.on_commit(lambda: AvailabilityService.invalidate_day_grid(booking_date))
@@ -1,8 +1,9 @@
 from django.urls import path
+from django.views.generic import TemplateView
 from . import views
 
 urlpatterns = [
-    path('', views.home, name='home'),
+    path('', TemplateView.as_view(template_name='booking/home.html'), name='home'),
     path('register/', views.register_view, name='register'),
     path('accounts/login/', views.login_view, name='login'),
     path('accounts/logout/', views.logout_view, name='logout'),
@@ -12,6 +13,7 @@ urlpatterns = [
     # API endpoints
     path('api/availability/', views.api_check_availability, name='api_availability'),
     path('api/calculate-price/', views.api_calculate_price, name='api_calculate_price'),
+    path('api/calculate-prices/', views.api_calculate_prices_bulk, name='api_calculate_prices_bulk'),
     path('api/confirm-booking/', views.confirm_booking, name='api_confirm_booking'),
     path('api/join-waitlist/', views.join_waitlist, name='api_join_waitlist'),
     path('api/remove-waitlist/', views.remove_from_waitlist, name='api_remove_waitlist'),
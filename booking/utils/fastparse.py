@@ -0,0 +1,21 @@
+"""
+Parsers for the fixed date and time formats used by the booking API
+
+These slice the string directly instead of going through strptime and
+raise ValueError for malformed input, like strptime does.
+"""
+from datetime import date, time
+
+
+def parse_date(s):
+    """Parse a 'YYYY-MM-DD' string into a date"""
+    if len(s) != 10 or s[4] != '-' or s[7] != '-':
+        raise ValueError(f"date {s!r} does not match format 'YYYY-MM-DD'")
+    return date(int(s[0:4]), int(s[5:7]), int(s[8:10]))
+
+
+def parse_hm(s):
+    """Parse an 'HH:MM' string into a time"""
+    if len(s) != 5 or s[2] != ':':
+        raise ValueError(f"time {s!r} does not match format 'HH:MM'")
+    return time(int(s[0:2]), int(s[3:5]))
@@ -2,22 +2,42 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, logout
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
-from django.http import JsonResponse
-from django.db import transaction
+from django.http import HttpResponse, JsonResponse
+from django.db import IntegrityError, connection, transaction
 from django.views.decorators.http import require_http_methods
 from django.contrib import messages
-from datetime import datetime, timedelta, date
+from datetime import timedelta, date
 from decimal import Decimal
+import orjson
 
 from .models import Court, Equipment, Coach, Booking, BookingEquipment, Waitlist
 from .services.availability import AvailabilityService
 from .services.pricing import PricingEngine
 from .services.waitlist import WaitlistService
+from .utils.fastparse import parse_date, parse_hm
 
 
-def home(request):
-    """Home page with date picker"""
-    return render(request, 'booking/home.html')
+def _json_response(data, status=200):
+    """JsonResponse equivalent serialised with orjson, for the high-traffic API endpoints"""
+    return HttpResponse(orjson.dumps(data), status=status, content_type='application/json')
+
+
+def _lock_court_slot(court_id, booking_date, start_time):
+    """
+    Serialise bookings for one court slot and return the court
+    
+    On PostgreSQL this takes a transaction-scoped advisory lock keyed by
+    (court, date + start time), so bookings for other slots of the same court
+    are not blocked; overlaps between slots with different start times are
+    rejected by the booking exclusion constraint. Other backends lock the
+    court row instead. Must be called inside transaction.atomic().
+    """
+    if connection.vendor == 'postgresql':
+        slot_key = booking_date.toordinal() * 1440 + start_time.hour * 60 + start_time.minute
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [int(court_id), slot_key])
+        return Court.objects.get(id=court_id)
+    return Court.objects.select_for_update().get(id=court_id)
 
 
 def register_view(request):
@@ -61,15 +81,16 @@ def booking_page(request):
     # Get date from query params or default to today
     selected_date_str = request.GET.get('date', date.today().isoformat())
     try:
-        selected_date = datetime.strptime(selected_date_str, '%Y-%m-%d').date()
+        selected_date = parse_date(selected_date_str)
     except ValueError:
         selected_date = date.today()
     
     # Generate next 7 days for date selection
     available_dates = [date.today() + timedelta(days=i) for i in range(7)]
     
-    # Get time slots
+    # Get time slots and the availability of each one
     time_slots = AvailabilityService.get_time_slots(selected_date)
+    day_grid = AvailabilityService.get_day_grid(selected_date)
     
     # Get all courts, equipment, and coaches for display
     courts = Court.objects.filter(is_active=True)
@@ -80,6 +101,7 @@ def booking_page(request):
         'selected_date': selected_date,
         'available_dates': available_dates,
         'time_slots': time_slots,
+        'day_grid': day_grid,
         'courts': courts,
         'equipment': equipment,
         'coaches': coaches,
@@ -96,31 +118,43 @@ def api_check_availability(request):
         start_time_str = request.GET.get('start_time')
         end_time_str = request.GET.get('end_time')
         
-        booking_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        start_time = datetime.strptime(start_time_str, '%H:%M').time()
-        end_time = datetime.strptime(end_time_str, '%H:%M').time()
+        booking_date = parse_date(date_str)
+        start_time = parse_hm(start_time_str)
+        end_time = parse_hm(end_time_str)
+        
+        # Only asking whether any equipment of one type is free: answer with one query
+        equipment_type = request.GET.get('equipment_type')
+        if equipment_type:
+            if equipment_type not in dict(Equipment.EQUIPMENT_TYPE_CHOICES):
+                return _json_response({'success': False, 'error': 'Unknown equipment type'}, status=400)
+            return _json_response({
+                'success': True,
+                'equipment_type': equipment_type,
+                'available': AvailabilityService.has_available_equipment(
+                    booking_date, start_time, end_time, equipment_type
+                ),
+            })
         
         # Get available resources
         available_courts = AvailabilityService.get_available_courts(booking_date, start_time, end_time)
         available_equipment = AvailabilityService.get_available_equipment(booking_date, start_time, end_time)
         available_coaches = AvailabilityService.get_available_coaches(booking_date, start_time, end_time)
         
-        return JsonResponse({
+        return _json_response({
             'success': True,
             'courts': [{'id': c.id, 'name': c.name, 'type': c.court_type} for c in available_courts],
             'equipment': [{'id': e['equipment'].id, 'name': e['equipment'].name, 'available_qty': e['available_quantity']} for e in available_equipment],
             'coaches': [{'id': c.id, 'name': c.name, 'fee': str(c.hourly_fee)} for c in available_coaches],
         })
     except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+        return _json_response({'success': False, 'error': str(e)}, status=400)
 
 
 @require_http_methods(["POST"])
 def api_calculate_price(request):
     """API endpoint to calculate price dynamically"""
     try:
-        import json
-        data = json.loads(request.body)
+        data = orjson.loads(request.body)
         
         court_id = data.get('court_id')
         date_str = data.get('date')
@@ -134,16 +168,48 @@ def api_calculate_price(request):
         )
         
         if 'error' in pricing_data:
-            return JsonResponse({'success': False, 'error': pricing_data['error']}, status=400)
+            return _json_response({'success': False, 'error': pricing_data['error']}, status=400)
         
-        return JsonResponse({
+        return _json_response({
             'success': True,
             'base_price': str(pricing_data['base_price']),
             'total_price': str(pricing_data['total_price']),
             'breakdown': pricing_data['breakdown']
         })
     except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+        return _json_response({'success': False, 'error': str(e)}, status=400)
+
+
+@require_http_methods(["POST"])
+def api_calculate_prices_bulk(request):
+    """API endpoint to calculate prices for many slots in one request"""
+    try:
+        data = orjson.loads(request.body)
+        
+        items = data.get('items', [])
+        if not isinstance(items, list):
+            return _json_response({'success': False, 'error': 'items must be a list'}, status=400)
+        if len(items) > PricingEngine.MAX_BATCH_ITEMS:
+            return _json_response({
+                'success': False,
+                'error': f'At most {PricingEngine.MAX_BATCH_ITEMS} items can be priced per request'
+            }, status=400)
+        
+        results = []
+        for pricing_data in PricingEngine.calculate_prices_batch(items):
+            if 'error' in pricing_data:
+                results.append({'success': False, 'error': pricing_data['error']})
+            else:
+                results.append({
+                    'success': True,
+                    'base_price': str(pricing_data['base_price']),
+                    'total_price': str(pricing_data['total_price']),
+                    'breakdown': pricing_data['breakdown']
+                })
+        
+        return _json_response({'success': True, 'results': results})
+    except Exception as e:
+        return _json_response({'success': False, 'error': str(e)}, status=400)
 
 
 @login_required
@@ -151,8 +217,7 @@ def api_calculate_price(request):
 def confirm_booking(request):
     """Create a new booking with atomic transaction and concurrent booking prevention"""
     try:
-        import json
-        data = json.loads(request.body)
+        data = orjson.loads(request.body)
         
         court_id = data.get('court_id')
         date_str = data.get('date')
@@ -162,28 +227,34 @@ def confirm_booking(request):
         coach_id = data.get('coach_id')
         
         # Parse date and times
-        booking_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        start_time = datetime.strptime(start_time_str, '%H:%M').time()
-        end_time = datetime.strptime(end_time_str, '%H:%M').time()
+        booking_date = parse_date(date_str)
+        start_time = parse_hm(start_time_str)
+        end_time = parse_hm(end_time_str)
         
         # Prepare equipment list for availability check
         equipment_check_list = [{'equipment_id': e['id'], 'quantity': e['quantity']} for e in equipment_list]
         
+        # Fetch requested equipment up front so the transaction below stays short
+        equipment_ids = [int(e['id']) for e in equipment_list]
+        equipment_map = Equipment.objects.in_bulk(equipment_ids)
+        if len(equipment_map) != len(set(equipment_ids)):
+            return JsonResponse({
+                'success': False,
+                'errors': ['Selected equipment does not exist']
+            }, status=400)
+        equipment_instances = [equipment_map[equipment_id] for equipment_id in equipment_ids]
+        
         # Use atomic transaction with SELECT FOR UPDATE to prevent concurrent bookings
         with transaction.atomic():
-            # Lock the court row to prevent concurrent bookings
-            court = Court.objects.select_for_update().get(id=court_id)
+            # Lock the court slot to prevent concurrent bookings
+            court = _lock_court_slot(court_id, booking_date, start_time)
             
             # Check if court is already booked for this slot (with lock held)
-            existing_booking = Booking.objects.select_for_update().filter(
-                court=court,
-                date=booking_date,
-                start_time__lt=end_time,
-                end_time__gt=start_time,
-                status='CONFIRMED'
-            ).first()
+            slot_taken = Booking.objects.select_for_update().overlapping(
+                booking_date, start_time, end_time
+            ).filter(court=court).exists()
             
-            if existing_booking:
+            if slot_taken:
                 # Slot is already booked, offer waitlist
                 return JsonResponse({
                     'success': False,
@@ -202,9 +273,7 @@ def confirm_booking(request):
                     'errors': availability_check['errors']
                 }, status=400)
             
-            # Get resources
             coach = Coach.objects.get(id=coach_id) if coach_id else None
-            equipment_instances = [Equipment.objects.get(id=e['id']) for e in equipment_list]
             
             # Calculate pricing
             pricing_data = PricingEngine.calculate_price(
@@ -226,12 +295,14 @@ def confirm_booking(request):
             )
             
             # Add equipment
-            for equip_data in equipment_list:
-                BookingEquipment.objects.create(
+            BookingEquipment.objects.bulk_create([
+                BookingEquipment(
                     booking=booking,
                     equipment_id=equip_data['id'],
                     quantity=equip_data['quantity']
                 )
+                for equip_data in equipment_list
+            ])
             
             return JsonResponse({
                 'success': True,
@@ -239,6 +310,17 @@ def confirm_booking(request):
                 'message': 'Booking confirmed successfully!'
             })
     
+    except IntegrityError as e:
+        if 'no_court_overlap' in str(e) or 'no_coach_overlap' in str(e):
+            # The database rejected an overlapping court or coach booking
+            return JsonResponse({
+                'success': False,
+                'error': 'The selected court or coach was just booked for this slot. Please choose another slot.'
+            }, status=409)
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
     except Exception as e:
         return JsonResponse({
             'success': False,
@@ -264,8 +346,7 @@ def booking_history(request):
 def join_waitlist(request):
     """Add user to waitlist for a specific slot"""
     try:
-        import json
-        data = json.loads(request.body)
+        data = orjson.loads(request.body)
         
         court_id = data.get('court_id')
         date_str = data.get('date')
@@ -273,22 +354,18 @@ def join_waitlist(request):
         end_time_str = data.get('end_time')
         
         # Parse date and times
-        booking_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        start_time = datetime.strptime(start_time_str, '%H:%M').time()
-        end_time = datetime.strptime(end_time_str, '%H:%M').time()
+        booking_date = parse_date(date_str)
+        start_time = parse_hm(start_time_str)
+        end_time = parse_hm(end_time_str)
         
         court = Court.objects.get(id=court_id)
         
         # Add to waitlist
-        waitlist_entry = WaitlistService.add_to_waitlist(
+        waitlist_entry, position = WaitlistService.add_to_waitlist(
             request.user, court, booking_date, start_time, end_time
         )
         
         if waitlist_entry:
-            position = WaitlistService.get_waitlist_position(
-                request.user, court, booking_date, start_time, end_time
-            )
-            
             return JsonResponse({
                 'success': True,
                 'message': f'You have been added to the waitlist (Position: {position})',
@@ -312,8 +389,7 @@ def join_waitlist(request):
 def remove_from_waitlist(request):
     """Remove user from waitlist"""
     try:
-        import json
-        data = json.loads(request.body)
+        data = orjson.loads(request.body)
         
         waitlist_id = data.get('waitlist_id')
         
@@ -340,8 +416,7 @@ def remove_from_waitlist(request):
 def cancel_booking(request):
     """Cancel a booking and notify next person in waitlist"""
     try:
-        import json
-        data = json.loads(request.body)
+        data = orjson.loads(request.body)
         
         booking_id = data.get('booking_id')
         
@@ -3,15 +3,27 @@ PRD Compliance Test Script
 Tests all major requirements from the PRD
 """
 
+import argparse
+import io
 import os
 import sys
+import inspect
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 import django
 
-# Setup Django environment
+# Setup Django environment (skipped when already set up, e.g. in a shell session)
+from django.apps import apps
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'badminton_booking.settings')
-django.setup()
+if not apps.ready:
+    django.setup()
 
 from django.contrib.auth.models import User
+from django.db import connections
+from django.db.models import Count
 from booking.models import Court, Equipment, Coach, CoachAvailability, PricingRule, Booking, Waitlist
 from booking.services.pricing import PricingEngine
 from booking.services.availability import AvailabilityService
@@ -19,57 +31,70 @@ from booking.services.waitlist import WaitlistService
 from datetime import date, time, timedelta
 from decimal import Decimal
 
+@lru_cache(maxsize=None)
+def get_source(obj):
+    """Return the source code of obj, reading it only once per object"""
+    return inspect.getsource(obj)
+
+RULE = "=" * 70
+
 def print_header(text):
-    print("\n" + "="*70)
-    print(f"  {text}")
-    print("="*70)
+    sys.stdout.write(f"\n{RULE}\n  {text}\n{RULE}\n")
 
 def test_resources():
     """Test that all required resources exist"""
     print_header("Testing Resources (Section 3 of PRD)")
     
     # Test Courts
-    courts = Court.objects.all()
-    indoor_courts = courts.filter(court_type='INDOOR')
-    outdoor_courts = courts.filter(court_type='OUTDOOR')
+    courts = list(Court.objects.values_list('name', 'court_type'))
+    indoor_courts = [name for name, court_type in courts if court_type == 'INDOOR']
+    outdoor_courts = [name for name, court_type in courts if court_type == 'OUTDOOR']
     
-    print(f"\n✓ Total Courts: {courts.count()} (Expected: 4)")
-    print(f"✓ Indoor Courts: {indoor_courts.count()} (Expected: 2)")
-    print(f"✓ Outdoor Courts: {outdoor_courts.count()} (Expected: 2)")
+    print(f"\n✓ Total Courts: {len(courts)} (Expected: 4)")
+    print(f"✓ Indoor Courts: {len(indoor_courts)} (Expected: 2)")
+    print(f"✓ Outdoor Courts: {len(outdoor_courts)} (Expected: 2)")
     
-    for court in courts:
-        print(f"  - {court.name} ({court.get_court_type_display()})")
+    court_type_labels = dict(Court.COURT_TYPE_CHOICES)
+    for name, court_type in courts:
+        print(f"  - {name} ({court_type_labels.get(court_type, court_type)})")
     
     # Test Equipment
-    equipment = Equipment.objects.all()
-    print(f"\n✓ Total Equipment Types: {equipment.count()} (Expected: 2)")
+    equipment = list(Equipment.objects.all())
+    print(f"\n✓ Total Equipment Types: {len(equipment)} (Expected: 2)")
     
     for equip in equipment:
         print(f"  - {equip.name}: {equip.total_quantity} units")
     
     # Test Coaches
-    coaches = Coach.objects.all()
-    print(f"\n✓ Total Coaches: {coaches.count()} (Expected: 3)")
+    coaches = list(Coach.objects.annotate(availability_count=Count('availability_slots')).order_by('name'))
+    print(f"\n✓ Total Coaches: {len(coaches)} (Expected: 3)")
     
     for coach in coaches:
         print(f"  - {coach.name}: ₹{coach.hourly_fee}/hr")
-        availability_count = coach.availability_slots.count()
-        print(f"    Availability slots: {availability_count}")
+        print(f"    Availability slots: {coach.availability_count}")
+
+def pricing_rule_effect(rule):
+    """Describe a pricing rule's effect, e.g. '20% increase' or '₹50.00 flat fee'"""
+    if rule['is_percentage']:
+        return f"{(rule['multiplier'] - 1) * 100:.0f}% increase"
+    return f"₹{rule['flat_fee']} flat fee"
 
 def test_pricing_rules():
     """Test that all pricing rules are configured"""
     print_header("Testing Pricing Rules (Section 5 of PRD)")
     
-    rules = PricingRule.objects.all()
-    print(f"\n✓ Total Pricing Rules: {rules.count()} (Expected: 6)")
+    rules = list(PricingRule.objects.order_by('priority').values(
+        'priority', 'name', 'rule_type', 'is_percentage', 'multiplier', 'flat_fee', 'is_enabled'
+    ))
+    print(f"\n✓ Total Pricing Rules: {len(rules)} (Expected: 6)")
     
-    for rule in rules.order_by('priority'):
-        status = "Enabled" if rule.is_enabled else "Disabled"
-        if rule.is_percentage:
-            effect = f"{(rule.multiplier - 1) * 100:.0f}% increase"
-        else:
-            effect = f"₹{rule.flat_fee} flat fee"
-        print(f"  {rule.priority}. {rule.name} ({rule.rule_type}): {effect} [{status}]")
+    lines = [
+        f"  {rule['priority']}. {rule['name']} ({rule['rule_type']}): {pricing_rule_effect(rule)} "
+        f"[{'Enabled' if rule['is_enabled'] else 'Disabled'}]"
+        for rule in rules
+    ]
+    if lines:
+        sys.stdout.write('\n'.join(lines) + '\n')
 
 def test_pricing_engine():
     """Test dynamic pricing calculation"""
@@ -80,10 +105,9 @@ def test_pricing_engine():
     equipment = Equipment.objects.first()
     coach = Coach.objects.first()
     
-    # Test date: Saturday (weekend)
+    # Test date: next Saturday (weekend), today if it is Saturday
     test_date = date.today()
-    while test_date.weekday() != 5:  # Saturday
-        test_date += timedelta(days=1)
+    test_date += timedelta(days=(5 - test_date.weekday()) % 7)
     
     # Test time: Peak hours (6 PM - 7 PM)
     start_time = time(18, 0)
@@ -107,18 +131,19 @@ def test_pricing_engine():
     for item in pricing_data['breakdown']:
         print(f"  - {item['rule']}: ₹{item['amount']:.2f}")
 
+LOCKING_PATTERN = re.compile(r'transaction\.atomic|select_for_update')
+
 def test_atomic_booking():
     """Test that booking logic uses atomic transactions"""
     print_header("Testing Atomic Booking (Section 4 of PRD)")
     
     # Check that the confirm_booking view uses transaction.atomic
     from booking import views
-    import inspect
     
-    source = inspect.getsource(views.confirm_booking)
+    hits = set(LOCKING_PATTERN.findall(get_source(views.confirm_booking)))
     
-    has_atomic = 'transaction.atomic' in source
-    has_select_for_update = 'select_for_update' in source
+    has_atomic = 'transaction.atomic' in hits
+    has_select_for_update = 'select_for_update' in hits
     
     print(f"\n✓ Uses transaction.atomic(): {has_atomic}")
     print(f"✓ Uses select_for_update(): {has_select_for_update}")
@@ -128,6 +153,10 @@ def test_atomic_booking():
     else:
         print("\n❌ Missing atomic transaction or locking!")
 
+REQUIRED_WAITLIST_METHODS = frozenset({
+    'add_to_waitlist', 'notify_next_in_queue', 'get_waitlist_position', 'remove_from_waitlist'
+})
+
 def test_waitlist_system():
     """Test waitlist functionality"""
     print_header("Testing Waitlist System (Section 9.2 of PRD)")
@@ -138,17 +167,13 @@ def test_waitlist_system():
     print(f"✓ Current waitlist entries: {waitlist_count}")
     
     # Check WaitlistService methods
-    from booking.services import waitlist
-    import inspect
-    
-    service_methods = [method for method in dir(WaitlistService) if not method.startswith('_')]
+    service_methods = {method for method in vars(WaitlistService) if not method.startswith('_')}
     
     print(f"\n✓ WaitlistService methods:")
-    for method in service_methods:
+    for method in sorted(service_methods):
         print(f"  - {method}")
     
-    required_methods = ['add_to_waitlist', 'notify_next_in_queue', 'get_waitlist_position', 'remove_from_waitlist']
-    has_all_methods = all(method in service_methods for method in required_methods)
+    has_all_methods = REQUIRED_WAITLIST_METHODS <= service_methods
     
     if has_all_methods:
         print("\n✅ All required waitlist methods are implemented!")
@@ -166,13 +191,32 @@ def test_admin_configuration():
     registered_models = [
         Court, Equipment, Coach, PricingRule, Booking, Waitlist
     ]
+    registered = set(django_admin.site._registry)
     
     print("\n✓ Admin-registered models:")
     for model in registered_models:
-        is_registered = model in django_admin.site._registry
+        is_registered = model in registered
         status = "✅" if is_registered else "❌"
         print(f"  {status} {model.__name__}")
 
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def existing_paths(paths, root=PROJECT_ROOT):
+    """Return the subset of paths (relative to root) that exist, listing each parent directory once"""
+    paths_by_dir = {}
+    for path in paths:
+        paths_by_dir.setdefault(os.path.dirname(path), []).append(path)
+    
+    present = set()
+    for dirname, dir_paths in paths_by_dir.items():
+        try:
+            with os.scandir(os.path.join(root, dirname)) as entries:
+                names = {entry.name for entry in entries}
+        except FileNotFoundError:
+            continue
+        present.update(path for path in dir_paths if os.path.basename(path) in names)
+    return present
+
 def test_deliverables():
     """Test that all deliverables exist"""
     print_header("Testing Deliverables (Section 10 of PRD)")
@@ -185,31 +229,78 @@ def test_deliverables():
         'PRD_COMPLIANCE_REPORT.md': 'PRD compliance report'
     }
     
+    present = existing_paths(deliverables)
+    
     print("\n✓ Deliverable files:")
     for file_path, description in deliverables.items():
-        exists = os.path.exists(file_path)
+        exists = file_path in present
         status = "✅" if exists else "❌"
         print(f"  {status} {file_path}")
         print(f"      {description}")
 
-def run_all_tests():
-    """Run all compliance tests"""
-    print("\n" + "="*70)
-    print("  BADMINTON COURT BOOKING SYSTEM - PRD COMPLIANCE TEST")
-    print("="*70)
+class SectionOutput:
+    """sys.stdout replacement that collects each thread's output in its own buffer"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+    
+    def capture(self):
+        """Start buffering output written by the current thread"""
+        self._local.buffer = io.StringIO()
+        return self._local.buffer
+    
+    def write(self, text):
+        return getattr(self._local, 'buffer', self.stream).write(text)
+    
+    def flush(self):
+        getattr(self._local, 'buffer', self.stream).flush()
+
+def run_section(output, test):
+    """Run one test section in a worker thread, returning (output, exception)"""
+    buffer = output.capture()
+    try:
+        test()
+        return buffer.getvalue(), None
+    except Exception as e:
+        return buffer.getvalue(), e
+    finally:
+        connections.close_all()
+
+TEST_SECTIONS = [
+    test_resources,
+    test_pricing_rules,
+    test_pricing_engine,
+    test_atomic_booking,
+    test_waitlist_system,
+    test_admin_configuration,
+    test_deliverables,
+]
+
+def run_all_tests(sections=None):
+    """Run all compliance tests, or only the given sections"""
+    if sections is None:
+        sections = TEST_SECTIONS
+    
+    print_header("BADMINTON COURT BOOKING SYSTEM - PRD COMPLIANCE TEST")
     
     try:
-        test_resources()
-        test_pricing_rules()
-        test_pricing_engine()
-        test_atomic_booking()
-        test_waitlist_system()
-        test_admin_configuration()
-        test_deliverables()
+        # Sections are independent, so run them concurrently and print each
+        # section's buffered output in order
+        output = SectionOutput(sys.stdout)
+        sys.stdout = output
+        try:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                results = list(executor.map(partial(run_section, output), sections))
+        finally:
+            sys.stdout = output.stream
         
-        print("\n" + "="*70)
-        print("  ✅ ALL PRD COMPLIANCE TESTS PASSED!")
-        print("="*70)
+        for section_output, error in results:
+            sys.stdout.write(section_output)
+            if error is not None:
+                raise error
+        
+        print_header("✅ ALL PRD COMPLIANCE TESTS PASSED!")
         print("\nThe system is fully compliant with all PRD requirements.")
         print("\nNext steps:")
         print("  1. Run: python manage.py runserver")
@@ -223,5 +314,21 @@ def run_all_tests():
         import traceback
         traceback.print_exc()
 
+def section_name(test):
+    """Command-line name of a test section, e.g. 'pricing_engine'"""
+    return test.__name__[len('test_'):]
+
 if __name__ == '__main__':
-    run_all_tests()
+    sections_by_name = {section_name(test): test for test in TEST_SECTIONS}
+    
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        '--only', nargs='+', choices=sections_by_name, metavar='SECTION',
+        help=f"run only these sections ({', '.join(sections_by_name)})"
+    )
+    args = parser.parse_args()
+    
+    if args.only:
+        run_all_tests([sections_by_name[name] for name in args.only])
+    else:
+        run_all_tests()